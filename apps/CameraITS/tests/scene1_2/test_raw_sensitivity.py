@@ -16,8 +16,7 @@
 
 import logging
 import os.path
-import matplotlib
-from matplotlib import pylab
+from matplotlib import pyplot as plt
 from mobly import test_runner
 
 import its_base_test
@@ -34,11 +33,20 @@ _VAR_THRESH = 1.01  # Each shot must be 1% noisier than previous
 
 
 def define_raw_stats_fmt(props):
-  """Define format with active array width and height."""
-  aaw = (props['android.sensor.info.preCorrectionActiveArraySize']['right'] -
-         props['android.sensor.info.preCorrectionActiveArraySize']['left'])
-  aah = (props['android.sensor.info.preCorrectionActiveArraySize']['bottom'] -
-         props['android.sensor.info.preCorrectionActiveArraySize']['top'])
+  """Define format with active array width and height.
+
+  rawStats only accepts grid cell dimensions, not a region of interest, so the
+  full grid is requested and the center cell is read from the result.
+
+  Args:
+    props: camera properties dict.
+
+  Returns:
+    rawStats format dict.
+  """
+  aa = props['android.sensor.info.preCorrectionActiveArraySize']
+  aaw = aa['right'] - aa['left']
+  aah = aa['bottom'] - aa['top']
   logging.debug('Active array W,H: %d,%d', aaw, aah)
   return {'format': 'rawStats',
           'gridWidth': aaw // _IMG_STATS_GRID,
@@ -79,14 +87,20 @@ class RawSensitivityTest(its_base_test.ItsBaseTest):
       s_ae, e_ae, _, _, _ = cam.do_3a(do_af=False, get_results=True)
       s_e_prod = s_ae * e_ae
 
+      # Capture in rawStats to reduce test run time
+      fmt = define_raw_stats_fmt(props)
+
+      # Find white_level for rawStats normalization and GR plane location
+      cfa_idxs = image_processing_utils.get_canonical_cfa_order(props)
+      gr_idx = cfa_idxs[_GR_PLANE_IDX]
+      white_level_sq = float(props['android.sensor.info.whiteLevel'])**2
+      cx = cy = _IMG_STATS_GRID//2
+
       sensitivities = list(range(sens_min, sens_max, sens_step))
       variances = []
       for s in sensitivities:
         e = int(s_e_prod / float(s))
         req = capture_request_utils.manual_capture_request(s, e, 0)
-
-        # Capture in rawStats to reduce test run time
-        fmt = define_raw_stats_fmt(props)
         cap = cam.do_capture(req, fmt)
 
         if self.debug_mode:
@@ -96,23 +110,21 @@ class RawSensitivityTest(its_base_test.ItsBaseTest):
               img, f'{name_with_log_path}_{s}_{e}ns.jpg', True)
 
         # Measure variance
-        _, var_image = image_processing_utils.unpack_rawstats_capture(cap)
-        cfa_idxs = image_processing_utils.get_canonical_cfa_order(props)
-        white_level = float(props['android.sensor.info.whiteLevel'])
-        var = var_image[_IMG_STATS_GRID//2, _IMG_STATS_GRID//2,
-                        cfa_idxs[_GR_PLANE_IDX]]/white_level**2
+        var = image_processing_utils.unpack_rawstats_capture_cell(
+            cap, cy, cx, gr_idx) / white_level_sq
         logging.debug('s=%d, e=%d, var=%e', s, e, var)
         variances.append(var)
 
       # Create plot
-      pylab.figure(_NAME)
-      pylab.plot(sensitivities, variances, '-ro')
-      pylab.xticks(sensitivities)
-      pylab.xlabel('Sensitivities')
-      pylab.ylabel('Image Center Patch Variance')
-      pylab.ticklabel_format(axis='y', style='sci', scilimits=(-6, -6))
-      pylab.title(_NAME)
-      matplotlib.pyplot.savefig(f'{name_with_log_path}_variances.png')
+      fig, ax = plt.subplots(num=_NAME)
+      ax.plot(sensitivities, variances, '-ro')
+      ax.set_xticks(sensitivities)
+      ax.set_xlabel('Sensitivities')
+      ax.set_ylabel('Image Center Patch Variance')
+      ax.ticklabel_format(axis='y', style='sci', scilimits=(-6, -6))
+      ax.set_title(_NAME)
+      fig.savefig(f'{name_with_log_path}_variances.png',
+                  pil_kwargs={'compress_level': 1})
 
       # Test that each shot is noisier than previous
       for i in range(len(variances) - 1):
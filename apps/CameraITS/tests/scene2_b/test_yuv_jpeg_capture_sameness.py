@@ -76,7 +76,7 @@ class YuvJpegCaptureSamenessTest(its_base_test.ItsBaseTest):
       max_camcorder_profile_size = cam.get_max_camcorder_profile_size(
           self.camera_id)
       size_bound = min([_MAX_IMG_SIZE, display_size, max_camcorder_profile_size],
-                       key=lambda t: int(t[0])*int(t[1]))
+                       key=lambda t: t[0]*t[1])
 
       logging.debug('display_size %s, max_camcorder_profile_size %s, size_bound %s',
                     display_size, max_camcorder_profile_size, size_bound)
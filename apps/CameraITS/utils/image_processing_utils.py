@@ -693,6 +693,31 @@ def unpack_rawstats_capture(cap):
   return mean_image, var_image
 
 
+def unpack_rawstats_capture_cell(cap, row, col, plane):
+  """Unpack a single variance value from a rawStats capture.
+
+  Reads only the requested element instead of building the full mean and
+  variance images as unpack_rawstats_capture does.
+
+  Args:
+    cap: A capture object as returned by its_session_utils.do_capture.
+    row: Grid row of the cell.
+    col: Grid column of the cell.
+    plane: Raw channel index in [0, 3].
+
+  Returns:
+    Float variance value, non-normalized, of plane at grid cell [row, col].
+  """
+  if cap['format'] != 'rawStats':
+    raise AssertionError(f"Unpack fmt != rawStats: {cap['format']}")
+  w = cap['width']
+  h = cap['height']
+  # Mean image is followed by variance image, each h x w x 4 float32
+  offset = (((h + row) * w + col) * 4 + plane) * 4
+  return float(numpy.frombuffer(cap['data'], dtype='<f', count=1,
+                                offset=offset)[0])
+
+
 def get_image_patch(img, xnorm, ynorm, wnorm, hnorm):
   """Get a patch (tile) of an image.
 
@@ -67,6 +67,21 @@ class ImageProcessingUtilsTest(unittest.TestCase):
         image_processing_utils.unpack_raw10_image(img_raw10),
         img_check))
 
+  def test_unpack_rawstats_capture_cell(self):
+    """Unit test for unpack_rawstats_capture_cell."""
+    grid_w, grid_h = 3, 2
+    stats = numpy.arange(2 * grid_h * grid_w * 4, dtype='<f')
+    cap = {'format': 'rawStats', 'width': grid_w, 'height': grid_h,
+           'data': stats.tobytes()}
+    _, var_image = image_processing_utils.unpack_rawstats_capture(cap)
+    for row in range(grid_h):
+      for col in range(grid_w):
+        for plane in range(4):
+          self.assertEqual(
+              image_processing_utils.unpack_rawstats_capture_cell(
+                  cap, row, col, plane),
+              var_image[row, col, plane])
+
   def test_compute_image_sharpness(self):
     """Unit test for compute_img_sharpness.
 
@@ -16,18 +16,26 @@
 
 
 import collections
+import fcntl
+import functools
 import json
 import logging
 import math
 import os
+import re
 import socket
 import subprocess
 import sys
+import tempfile
 import time
-import unicodedata
 
 import numpy
 
+try:
+  import orjson  # pylint: disable=g-import-not-at-top
+except ImportError:
+  orjson = None
+
 import camera_properties_utils
 import capture_request_utils
 import error_util
@@ -49,6 +57,20 @@ LEGACY_TABLET_NAME = 'dragon'
 TABLET_REQUIREMENTS_URL = 'https://source.android.com/docs/compatibility/cts/camera-its-box#tablet-requirements'
 BRIGHTNESS_ERROR_MSG = ('Tablet brightness not set as per '
                         f'{TABLET_REQUIREMENTS_URL} in the config file')
+_TABLET_NAME_TO_BRIGHTNESS = {
+    LEGACY_TABLET_NAME: LEGACY_TABLET_BRIGHTNESS,
+    **{name: ELEVEN_BIT_TABLET_BRIGHTNESS for name in ELEVEN_BIT_TABLET_NAMES},
+}
+_CameraIdCombo = collections.namedtuple('CameraIdCombo', ['id', 'sub_id'])
+
+# Chart scalings with a pre-scaled scene image, checked in order.
+_SCALED_CHART_SCALES = (
+    opencv_processing_utils.SCALE_RFOV_IN_WFOV_BOX,
+    opencv_processing_utils.SCALE_TELE_IN_WFOV_BOX,
+    opencv_processing_utils.SCALE_TELE25_IN_RFOV_BOX,
+    opencv_processing_utils.SCALE_TELE40_IN_RFOV_BOX,
+    opencv_processing_utils.SCALE_TELE_IN_RFOV_BOX,
+)
 
 _VALIDATE_LIGHTING_PATCH_H = 0.05
 _VALIDATE_LIGHTING_PATCH_W = 0.05
@@ -66,6 +88,72 @@ _STR_VALUE = 'strValue'
 _TAG_STR = 'tag'
 _CAMERA_ID_STR = 'cameraId'
 _USE_CASE_CROPPED_RAW = 6
+_REBOOT_DEFAULT_WAIT_SEC = 30
+
+# Pre-serialized commands that take no arguments.
+_CHECK_SENSOR_EXISTENCE_CMD = b'{"cmdName":"checkSensorExistence"}\n'
+_CLOSE_CMD = b'{"cmdName":"close"}\n'
+_GET_CAMERA_IDS_CMD = b'{"cmdName":"getCameraIds"}\n'
+_GET_CAMERA_PROPERTIES_CMD = b'{"cmdName":"getCameraProperties"}\n'
+_GET_DISPLAY_SIZE_CMD = b'{"cmdName":"getDisplaySize"}\n'
+_GET_SENSOR_EVENTS_CMD = b'{"cmdName":"getSensorEvents"}\n'
+_IS_LANDSCAPE_TO_PORTRAIT_ENABLED_CMD = (
+    b'{"cmdName":"isLandscapeToPortraitEnabled"}\n')
+_IS_CAMERA_PRIVACY_MODE_SUPPORTED_CMD = (
+    b'{"cmdName":"isCameraPrivacyModeSupported"}\n')
+_IS_PERFORMANCE_CLASS_CMD = b'{"cmdName":"isPerformanceClass"}\n'
+_START_SENSOR_EVENTS_CMD = b'{"cmdName":"startSensorEvents"}\n'
+
+# Only one of these may be requested in a single capture.
+_RAW_FORMATS = frozenset({'dng', 'raw', 'raw10', 'raw12', 'rawStats'})
+
+# Matches one '[name]: [value]' line of getprop output.
+_GETPROP_LINE_PATTERN = re.compile(
+    r'^\[([^\]]+)\]: \[(.*)\]\r?$', re.MULTILINE)
+
+
+def _orjson_default(obj):
+  """Serializes float subclasses such as numpy.float64, like json.dumps()."""
+  if isinstance(obj, float):
+    return float(obj)
+  raise TypeError(f'Object of type {type(obj).__name__} is not JSON '
+                  'serializable')
+
+
+def _json_dumps(obj):
+  """Serializes obj to JSON bytes, with orjson if it is installed."""
+  if orjson is not None:
+    return orjson.dumps(
+        obj, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+  return json.dumps(obj, separators=(',', ':')).encode()
+
+
+def _json_loads(data):
+  """Deserializes JSON bytes, with orjson if it is installed."""
+  if orjson is not None:
+    return orjson.loads(data)
+  return json.loads(data)
+
+
+@functools.lru_cache(maxsize=1)
+def _parse_argv():
+  """Parses the ItsSession command line args once per process.
+
+  Returns:
+    Dictionary with 'reboot' set to the seconds to wait after a reboot if a
+    "reboot" or "reboot=N" arg is given, and 'camera_ids' set to the list of
+    IDs if a "camera=" arg is given.
+  """
+  args = {}
+  for s in sys.argv[1:]:
+    if s.startswith('reboot'):
+      if len(s) > 7 and s[6] == '=':
+        args['reboot'] = int(s[7:])
+      else:
+        args['reboot'] = _REBOOT_DEFAULT_WAIT_SEC
+    elif s.startswith('camera=') and len(s) > 7:
+      args['camera_ids'] = s[7:].split(',')
+  return args
 
 
 def validate_tablet_brightness(tablet_name, brightness):
@@ -76,17 +164,10 @@ def validate_tablet_brightness(tablet_name, brightness):
     tablet_name: tablet product name specified by `ro.build.product`.
     brightness: brightness specified by config file.
   """
-  name_to_brightness = {
-      LEGACY_TABLET_NAME: LEGACY_TABLET_BRIGHTNESS,
-  }
-  for name in ELEVEN_BIT_TABLET_NAMES:
-    name_to_brightness[name] = ELEVEN_BIT_TABLET_BRIGHTNESS
-  if tablet_name in name_to_brightness:
-    if brightness != name_to_brightness[tablet_name]:
-      raise AssertionError(BRIGHTNESS_ERROR_MSG)
-  else:
-    if brightness != DEFAULT_TABLET_BRIGHTNESS:
-      raise AssertionError(BRIGHTNESS_ERROR_MSG)
+  expected_brightness = _TABLET_NAME_TO_BRIGHTNESS.get(
+      tablet_name, DEFAULT_TABLET_BRIGHTNESS)
+  if brightness != expected_brightness:
+    raise AssertionError(BRIGHTNESS_ERROR_MSG)
 
 
 class ItsSession(object):
@@ -111,14 +192,16 @@ class ItsSession(object):
   IPADDR = '127.0.0.1'
   REMOTE_PORT = 6000
   BUFFER_SIZE = 4096
+  # Maximum bytes received per recv_into() call while reading a response line.
+  READ_BUFFER_SIZE = 64 * 1024
 
-  # LOCK_PORT is used as a mutex lock to protect the list of forwarded ports
-  # among all processes. The script assumes LOCK_PORT is available and will
-  # try to use ports between CLIENT_PORT_START and
-  # CLIENT_PORT_START+MAX_NUM_PORTS-1 on host for ITS sessions.
+  # LOCK_FILE is locked with flock() as a mutex to protect the list of
+  # forwarded ports among all processes. The script will try to use ports
+  # between CLIENT_PORT_START and CLIENT_PORT_START+MAX_NUM_PORTS-1 on host
+  # for ITS sessions.
   CLIENT_PORT_START = 6000
   MAX_NUM_PORTS = 100
-  LOCK_PORT = CLIENT_PORT_START + MAX_NUM_PORTS
+  LOCK_FILE = os.path.join(tempfile.gettempdir(), 'its_session.lock')
 
   # Seconds timeout on each socket operation.
   SOCK_TIMEOUT = 20.0
@@ -137,21 +220,26 @@ class ItsSession(object):
   ITS_SERVICE_VERSION = '1.0'
 
   SEC_TO_NSEC = 1000*1000*1000.0
-  adb = 'adb -d'
 
   # Predefine camera props. Save props extracted from the function,
   # "get_camera_properties".
-  props = None
+  _props = None
+  # Largest YUV output size for _props, computed on first use.
+  _max_yuv_size = None
 
-  IMAGE_FORMAT_LIST_1 = [
+  # Only used for membership tests on result tags.
+  IMAGE_FORMAT_LIST_1 = frozenset({
       'jpegImage', 'rawImage', 'raw10Image', 'raw12Image', 'rawStatsImage',
       'dngImage', 'y8Image', 'jpeg_rImage'
-  ]
+  })
+  # Maps the result tags above to their format names, without 'Image'.
+  _IMAGE_TAG_TO_FORMAT = {tag: tag[:-5] for tag in IMAGE_FORMAT_LIST_1}
 
-  IMAGE_FORMAT_LIST_2 = [
+  # Iterated in order for tag prefix matching.
+  IMAGE_FORMAT_LIST_2 = (
       'jpegImage', 'rawImage', 'raw10Image', 'raw12Image', 'rawStatsImage',
       'yuvImage', 'jpeg_rImage'
-  ]
+  )
 
   CAP_JPEG = {'format': 'jpeg'}
   CAP_RAW = {'format': 'raw'}
@@ -162,88 +250,87 @@ class ItsSession(object):
   def __init_socket_port(self):
     """Initialize the socket port for the host to forward requests to the device.
 
-    This method assumes localhost's LOCK_PORT is available and will try to
-    use ports between CLIENT_PORT_START and CLIENT_PORT_START+MAX_NUM_PORTS-1
+    This method will try to use ports between CLIENT_PORT_START and
+    CLIENT_PORT_START+MAX_NUM_PORTS-1
     """
-    num_retries = 100
-    retry_wait_time_sec = 0.05
-
-    # Bind a socket to use as mutex lock
-    socket_lock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    for i in range(num_retries):
-      try:
-        socket_lock.bind((ItsSession.IPADDR, ItsSession.LOCK_PORT))
-        break
-      except (socket.error, socket.timeout) as socket_issue:
-        if i == num_retries - 1:
-          raise error_util.CameraItsError(
-              self._device_id, 'socket lock returns error') from socket_issue
-        else:
-          time.sleep(retry_wait_time_sec)
-
-    # Check if a port is already assigned to the device.
-    command = 'adb forward --list'
-    proc = subprocess.Popen(command.split(), stdout=subprocess.PIPE)
-    # pylint: disable=unused-variable
-    output, error = proc.communicate()
-    port = None
-    used_ports = []
-    for line  in output.decode('utf-8').split(os.linesep):
-      # each line should be formatted as:
-      # "<device_id> tcp:<host_port> tcp:<remote_port>"
-      forward_info = line.split()
-      if len(forward_info) >= 3 and len(
-          forward_info[1]) > 4 and forward_info[1][:4] == 'tcp:' and len(
-              forward_info[2]) > 4 and forward_info[2][:4] == 'tcp:':
-        local_p = int(forward_info[1][4:])
-        remote_p = int(forward_info[2][4:])
-        if forward_info[
-            0] == self._device_id and remote_p == ItsSession.REMOTE_PORT:
-          port = local_p
-          break
-        else:
-          used_ports.append(local_p)
+    # Lock a file to use as mutex lock. flock() only needs read access, so a
+    # lock file created by another user on the same host can still be used.
+    # Open an existing file without O_CREAT: with fs.protected_regular set,
+    # any O_CREAT open of another user's file in sticky /tmp fails.
+    try:
+      lock_fd = os.open(self.LOCK_FILE, os.O_RDONLY)
+    except FileNotFoundError:
+      lock_fd = os.open(self.LOCK_FILE, os.O_CREAT | os.O_RDONLY, 0o644)
+    try:
+      fcntl.flock(lock_fd, fcntl.LOCK_EX)
+      # Check if a port is already assigned to the device.
+      output = subprocess.run(['adb', 'forward', '--list'],
+                              stdout=subprocess.PIPE, text=True,
+                              check=False).stdout
+      port = None
+      used_ports = set()
+      for line in output.splitlines():
+        # each line should be formatted as:
+        # "<device_id> tcp:<host_port> tcp:<remote_port>"
+        forward_info = line.split()
+        if (len(forward_info) >= 3 and
+            len(forward_info[1]) > 4 and forward_info[1].startswith('tcp:') and
+            len(forward_info[2]) > 4 and forward_info[2].startswith('tcp:')):
+          local_p = int(forward_info[1][4:])
+          remote_p = int(forward_info[2][4:])
+          if (forward_info[0] == self._device_id and
+              remote_p == ItsSession.REMOTE_PORT):
+            port = local_p
+            break
+          else:
+            used_ports.add(local_p)
 
       # Find the first available port if no port is assigned to the device.
-    if port is None:
-      for p in range(ItsSession.CLIENT_PORT_START,
-                     ItsSession.CLIENT_PORT_START + ItsSession.MAX_NUM_PORTS):
-        if self.check_port_availability(p, used_ports):
-          port = p
-          break
-
-    if port is None:
-      raise error_util.CameraItsError(self._device_id,
-                                      ' cannot find an available ' + 'port')
-
-    # Release the socket as mutex unlock
-    socket_lock.close()
+      if port is None:
+        for p in range(ItsSession.CLIENT_PORT_START,
+                       ItsSession.CLIENT_PORT_START + ItsSession.MAX_NUM_PORTS):
+          if self.check_port_availability(p, used_ports):
+            port = p
+            break
+
+      if port is None:
+        raise error_util.CameraItsError(self._device_id,
+                                        ' cannot find an available ' + 'port')
+    finally:
+      # Release the file lock as mutex unlock
+      fcntl.flock(lock_fd, fcntl.LOCK_UN)
+      os.close(lock_fd)
 
     # Connect to the socket
-    self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    self.sock.connect((self.IPADDR, port))
-    self.sock.settimeout(self.SOCK_TIMEOUT)
+    self.sock = socket.create_connection((self.IPADDR, port),
+                                         timeout=self.SOCK_TIMEOUT)
+    # Commands are small request/response messages; don't let Nagle's
+    # algorithm hold them back waiting for an ACK.
+    self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    # Bytes received past the last response line, consumed by the next read.
+    self._rx_buf = bytearray()
+    self._rx_chunk = bytearray(self.READ_BUFFER_SIZE)
 
   def check_port_availability(self, check_port, used_ports):
     """Check if the port is available or not.
 
     Args:
       check_port: Port to check for availability
-      used_ports: List of used ports
+      used_ports: Set of used ports
 
     Returns:
      True if the given port is available and can be assigned to the device.
     """
     if check_port not in used_ports:
       # Try to run "adb forward" with the port
-      command = ('%s forward tcp:%d tcp:%d' %
-                 (self.adb, check_port, self.REMOTE_PORT))
-      proc = subprocess.Popen(
-          command.split(), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-      error = proc.communicate()[1]
+      command = self._adb_argv + [
+          'forward', f'tcp:{check_port}', f'tcp:{self.REMOTE_PORT}']
+      error = subprocess.run(
+          command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+          check=False).stderr
 
       # Check if there is no error
-      if error is None or error.find('error'.encode()) < 0:
+      if error is None or error.find(b'error') < 0:
         return True
       else:
         return False
@@ -255,37 +342,32 @@ class ItsSession(object):
     provides a "reboot" or "reboot=N" arg, then reboot the device,
     waiting for N seconds (default 30) before returning.
     """
-
-    for s in sys.argv[1:]:
-      if s[:6] == 'reboot':
-        duration = 30
-        if len(s) > 7 and s[6] == '=':
-          duration = int(s[7:])
-        logging.debug('Rebooting device')
-        _run(f'{self.adb} reboot')
-        _run(f'{self.adb} wait-for-device')
-        time.sleep(duration)
-        logging.debug('Reboot complete')
+    duration = _parse_argv().get('reboot')
+    if duration is not None:
+      logging.debug('Rebooting device')
+      _run(self._adb_argv + ['reboot'])
+      _run(self._adb_argv + ['wait-for-device'])
+      time.sleep(duration)
+      logging.debug('Reboot complete')
 
     # Flush logcat so following code won't be misled by previous
     # 'ItsService ready' log.
-    _run(f'{self.adb} logcat -c')
+    _run(self._adb_argv + ['logcat', '-c'])
     time.sleep(1)
 
-    _run(f'{self.adb} shell am force-stop --user 0 {self.PACKAGE}')
-    _run(f'{self.adb} shell am start-foreground-service --user 0 '
-         f'-t text/plain -a {self.INTENT_START}')
+    # Restart ItsService in one device shell; '&&' stops at, and _run()
+    # raises on, the first command that fails.
+    _run(self._adb_argv + [
+        'shell',
+        f'am force-stop --user 0 {self.PACKAGE} && '
+        'am start-foreground-service --user 0 '
+        f'-t text/plain -a {self.INTENT_START}'])
 
-    # Wait until the socket is ready to accept a connection.
-    proc = subprocess.Popen(
-        self.adb.split() + ['logcat'], stdout=subprocess.PIPE)
-    logcat = proc.stdout
-    while True:
-      line = logcat.readline().strip()
-      if line.find(b'ItsService ready') >= 0:
-        break
-    proc.kill()
-    proc.communicate()
+    # Wait until the socket is ready to accept a connection. logcat exits
+    # after printing the first line matching the regex.
+    subprocess.run(
+        self._adb_argv + ['logcat', '-e', 'ItsService ready', '-m', '1'],
+        stdout=subprocess.DEVNULL, check=True)
 
   def __init__(self, device_id=None, camera_id=None, hidden_physical_id=None,
                override_to_portrait=None):
@@ -293,9 +375,19 @@ class ItsSession(object):
     self._device_id = device_id
     self._hidden_physical_id = hidden_physical_id
     self._override_to_portrait = override_to_portrait
+    # Camera properties by (camera_id, override_to_portrait), cleared when the
+    # camera is closed.
+    self._props_cache = {}
+    # Properties of every camera ID on the device and FoVs by camera ID, both
+    # computed on first use and cleared with the properties cache.
+    self._id_to_props_cache = None
+    self._id_to_fov_cache = {}
+    # Results of queries for fixed device capabilities, keyed by command name
+    # and arguments.
+    self._rpc_cache = {}
 
     # Initialize device id and adb command.
-    self.adb = 'adb -s ' + self._device_id
+    self._adb_argv = ['adb', '-s', self._device_id]
     self.__wait_for_service()
     self.__init_socket_port()
 
@@ -306,10 +398,31 @@ class ItsSession(object):
 
   def __exit__(self, exec_type, exec_value, exec_traceback):
     if hasattr(self, 'sock') and self.sock:
-      self.__close_camera()
-      self.sock.close()
+      try:
+        self.__close_camera()
+      finally:
+        self.sock.close()
     return False
 
+  @property
+  def props(self):
+    return self._props
+
+  @props.setter
+  def props(self, props):
+    self._props = props
+    self._max_yuv_size = None
+
+  @property
+  def max_yuv_size(self):
+    """Largest available YUV output size of self.props as (width, height)."""
+    if self._max_yuv_size is None:
+      if self.props is None:
+        raise error_util.CameraItsError('Camera props are unavailable')
+      self._max_yuv_size = capture_request_utils.get_available_output_sizes(
+          'yuv', self.props)[0]
+    return self._max_yuv_size
+
   def override_with_hidden_physical_camera_props(self, props):
     """Check that it is a valid sub-camera backing the logical camera.
 
@@ -341,9 +454,7 @@ class ItsSession(object):
     Returns:
      The Python dictionary object for the CameraProperties object.
     """
-    cmd = {}
-    cmd[_CMD_NAME_STR] = 'getCameraProperties'
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
+    self.sock.sendall(_GET_CAMERA_PROPERTIES_CMD)
     data, _ = self.__read_response_from_socket()
     if data[_TAG_STR] != 'cameraProperties':
       raise error_util.CameraItsError('Invalid command response')
@@ -361,16 +472,29 @@ class ItsSession(object):
      The Python dictionary object for the CameraProperties object. Empty
      if no such device exists.
     """
+    cache_key = (camera_id, override_to_portrait)
+    if cache_key in self._props_cache:
+      return self._props_cache[cache_key]
     cmd = {}
     cmd[_CMD_NAME_STR] = 'getCameraPropertiesById'
     cmd[_CAMERA_ID_STR] = camera_id
     if override_to_portrait is not None:
       cmd['overrideToPortrait'] = override_to_portrait
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
+    self._send_cmd(cmd)
     data, _ = self.__read_response_from_socket()
     if data[_TAG_STR] != 'cameraProperties':
       raise error_util.CameraItsError('Invalid command response')
-    return data[_OBJ_VALUE_STR]['cameraProperties']
+    props = data[_OBJ_VALUE_STR]['cameraProperties']
+    self._props_cache[cache_key] = props
+    return props
+
+  def _send_cmd(self, cmd):
+    """Serializes a command and sends it to the device as one write.
+
+    Args:
+     cmd: The Python dictionary for the command.
+    """
+    self.sock.sendall(_json_dumps(cmd) + b'\n')
 
   def __read_response_from_socket(self):
     """Reads a line (newline-terminated) string serialization of JSON object.
@@ -378,28 +502,65 @@ class ItsSession(object):
     Returns:
      Deserialized json obj.
     """
-    chars = []
-    while not chars or chars[-1] != '\n':
-      ch = self.sock.recv(1).decode('utf-8')
-      if not ch:
-        # Socket was probably closed; otherwise don't get empty strings
+    rx_buf = self._rx_buf
+    start = 0
+    end = rx_buf.find(b'\n')
+    while end < 0:
+      start = len(rx_buf)
+      nbytes = self.sock.recv_into(self._rx_chunk)
+      if not nbytes:
+        # Socket was probably closed; otherwise don't get partial lines
         raise error_util.CameraItsError('Problem with socket on device side')
-      chars.append(ch)
-    line = ''.join(chars)
-    jobj = json.loads(line)
+      rx_buf += memoryview(self._rx_chunk)[:nbytes]
+      end = rx_buf.find(b'\n', start)
+    jobj = _json_loads(bytes(rx_buf[:end + 1]))
+    del rx_buf[:end + 1]
     # Optionally read a binary buffer of a fixed size.
     buf = None
     if 'bufValueSize' in jobj:
       n = jobj['bufValueSize']
-      buf = bytearray(n)
+      buf = numpy.empty(n, dtype=numpy.uint8)
       view = memoryview(buf)
+      # Bytes received along with the response line come first.
+      nbytes = min(n, len(rx_buf))
+      view[:nbytes] = rx_buf[:nbytes]
+      del rx_buf[:nbytes]
+      view = view[nbytes:]
+      n -= nbytes
       while n > 0:
         nbytes = self.sock.recv_into(view, n)
+        if not nbytes:
+          raise error_util.CameraItsError('Problem with socket on device side')
         view = view[nbytes:]
         n -= nbytes
-      buf = numpy.frombuffer(buf, dtype=numpy.uint8)
     return jobj, buf
 
+  def _query(self, cmd, expected_tag, error_msg, timeout=None):
+    """Sends a command and returns the string value of its single response.
+
+    Args:
+      cmd: Command dictionary, or pre-serialized command bytes.
+      expected_tag: Tag the response must have.
+      error_msg: Message of the CameraItsError raised on any other tag.
+      timeout: [Optional] Socket timeout in seconds while waiting for the
+        response. The default timeout is restored once it arrives.
+
+    Returns:
+      The strValue of the response.
+    """
+    if isinstance(cmd, bytes):
+      self.sock.sendall(cmd)
+    else:
+      self._send_cmd(cmd)
+    if timeout is not None:
+      self.sock.settimeout(timeout)
+    data, _ = self.__read_response_from_socket()
+    if timeout is not None:
+      self.sock.settimeout(self.SOCK_TIMEOUT)
+    if data[_TAG_STR] != expected_tag:
+      raise error_util.CameraItsError(error_msg)
+    return data[_STR_VALUE]
+
   def __open_camera(self):
     """Get the camera ID to open if it is an argument as a single camera.
 
@@ -412,26 +573,27 @@ class ItsSession(object):
     """
     if not self._camera_id:
       self._camera_id = 0
-      for s in sys.argv[1:]:
-        if s[:7] == 'camera=' and len(s) > 7:
-          camera_ids = s[7:].split(',')
-          camera_id_combos = parse_camera_ids(camera_ids)
-          if len(camera_id_combos) == 1:
-            self._camera_id = camera_id_combos[0].id
-            self._hidden_physical_id = camera_id_combos[0].sub_id
+      camera_ids = _parse_argv().get('camera_ids')
+      if camera_ids:
+        camera_id_combos = parse_camera_ids(camera_ids)
+        if len(camera_id_combos) == 1:
+          self._camera_id = camera_id_combos[0].id
+          self._hidden_physical_id = camera_id_combos[0].sub_id
 
     logging.debug('Opening camera: %s', self._camera_id)
     cmd = {_CMD_NAME_STR: 'open', _CAMERA_ID_STR: self._camera_id}
     if self._override_to_portrait is not None:
       cmd['overrideToPortrait'] = self._override_to_portrait
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
+    self._send_cmd(cmd)
     data, _ = self.__read_response_from_socket()
     if data[_TAG_STR] != 'cameraOpened':
       raise error_util.CameraItsError('Invalid command response')
 
   def __close_camera(self):
-    cmd = {_CMD_NAME_STR: 'close'}
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
+    self._props_cache.clear()
+    self._id_to_props_cache = None
+    self._id_to_fov_cache.clear()
+    self.sock.sendall(_CLOSE_CMD)
     data, _ = self.__read_response_from_socket()
     if data[_TAG_STR] != 'cameraClosed':
       raise error_util.CameraItsError('Invalid command response')
@@ -453,13 +615,11 @@ class ItsSession(object):
     Returns:
        A Python dictionary that returns keys and booleans for each sensor.
     """
-    cmd = {}
-    cmd[_CMD_NAME_STR] = 'checkSensorExistence'
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
+    self.sock.sendall(_CHECK_SENSOR_EXISTENCE_CMD)
     data, _ = self.__read_response_from_socket()
     if data[_TAG_STR] != 'sensorExistence':
-      raise error_util.CameraItsError('Invalid response for command: %s' %
-                                      cmd[_CMD_NAME_STR])
+      raise error_util.CameraItsError(
+          'Invalid response for command: checkSensorExistence')
     return data[_OBJ_VALUE_STR]
 
   def start_sensor_events(self):
@@ -470,13 +630,11 @@ class ItsSession(object):
     Returns:
        Nothing.
     """
-    cmd = {}
-    cmd[_CMD_NAME_STR] = 'startSensorEvents'
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
+    self.sock.sendall(_START_SENSOR_EVENTS_CMD)
     data, _ = self.__read_response_from_socket()
     if data[_TAG_STR] != 'sensorEventsStarted':
-      raise error_util.CameraItsError('Invalid response for command: %s' %
-                                      cmd[_CMD_NAME_STR])
+      raise error_util.CameraItsError(
+          'Invalid response for command: startSensorEvents')
 
   def get_sensor_events(self):
     """Get a trace of all sensor events on the device.
@@ -499,15 +657,13 @@ class ItsSession(object):
             of which maps to a list of objects containing "time","x","y","z"
             keys.
     """
-    cmd = {}
-    cmd[_CMD_NAME_STR] = 'getSensorEvents'
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
+    self.sock.sendall(_GET_SENSOR_EVENTS_CMD)
     timeout = self.SOCK_TIMEOUT + self.EXTRA_SOCK_TIMEOUT
     self.sock.settimeout(timeout)
     data, _ = self.__read_response_from_socket()
     if data[_TAG_STR] != 'sensorEvents':
-      raise error_util.CameraItsError('Invalid response for command: %s ' %
-                                      cmd[_CMD_NAME_STR])
+      raise error_util.CameraItsError(
+          'Invalid response for command: getSensorEvents ')
     self.sock.settimeout(self.SOCK_TIMEOUT)
     return data[_OBJ_VALUE_STR]
 
@@ -517,8 +673,7 @@ class ItsSession(object):
     Returns:
       List of camera ids on the device.
     """
-    cmd = {'cmdName': 'getCameraIds'}
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
+    self.sock.sendall(_GET_CAMERA_IDS_CMD)
     timeout = self.SOCK_TIMEOUT + self.EXTRA_SOCK_TIMEOUT
     self.sock.settimeout(timeout)
     data, _ = self.__read_response_from_socket()
@@ -536,7 +691,7 @@ class ItsSession(object):
     """
     cmd = {_CMD_NAME_STR: 'doGetUnavailablePhysicalCameras',
            _CAMERA_ID_STR: camera_id}
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
+    self._send_cmd(cmd)
     timeout = self.SOCK_TIMEOUT + self.EXTRA_SOCK_TIMEOUT
     self.sock.settimeout(timeout)
     data, _ = self.__read_response_from_socket()
@@ -553,16 +708,11 @@ class ItsSession(object):
       Boolean: True, if device supports HLG10 video recording, False in
       all other cases.
     """
-    cmd = {}
-    cmd[_CMD_NAME_STR] = 'isHLG10Supported'
-    cmd[_CAMERA_ID_STR] = self._camera_id
-    cmd['profileId'] = profile_id
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
-
-    data, _ = self.__read_response_from_socket()
-    if data[_TAG_STR] != 'hlg10Response':
-      raise error_util.CameraItsError('Failed to query HLG10 support')
-    return data[_STR_VALUE] == 'true'
+    cmd = {_CMD_NAME_STR: 'isHLG10Supported',
+           _CAMERA_ID_STR: self._camera_id,
+           'profileId': profile_id}
+    return self._query(
+        cmd, 'hlg10Response', 'Failed to query HLG10 support') == 'true'
 
   def is_p3_capture_supported(self):
     """Query whether the camera device supports P3 image capture.
@@ -571,15 +721,9 @@ class ItsSession(object):
       Boolean: True, if device supports P3 image capture, False in
       all other cases.
     """
-    cmd = {}
-    cmd[_CMD_NAME_STR] = 'isP3Supported'
-    cmd[_CAMERA_ID_STR] = self._camera_id
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
-
-    data, _ = self.__read_response_from_socket()
-    if data[_TAG_STR] != 'p3Response':
-      raise error_util.CameraItsError('Failed to query P3 support')
-    return data[_STR_VALUE] == 'true'
+    cmd = {_CMD_NAME_STR: 'isP3Supported', _CAMERA_ID_STR: self._camera_id}
+    return self._query(
+        cmd, 'p3Response', 'Failed to query P3 support') == 'true'
 
   def is_landscape_to_portrait_enabled(self):
     """Query whether the device has enabled the landscape to portrait property.
@@ -588,9 +732,7 @@ class ItsSession(object):
       Boolean: True, if the device has the system property enabled. False
       otherwise.
     """
-    cmd = {}
-    cmd[_CMD_NAME_STR] = 'isLandscapeToPortraitEnabled'
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
+    self.sock.sendall(_IS_LANDSCAPE_TO_PORTRAIT_ENABLED_CMD)
 
     data, _ = self.__read_response_from_socket()
     if data[_TAG_STR] != 'landscapeToPortraitEnabledResponse':
@@ -652,7 +794,7 @@ class ItsSession(object):
     if ae_target_fps_min and ae_target_fps_max:
       cmd['aeTargetFpsMin'] = ae_target_fps_min
       cmd['aeTargetFpsMax'] = ae_target_fps_max
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
+    self._send_cmd(cmd)
     timeout = self.SOCK_TIMEOUT + self.EXTRA_SOCK_TIMEOUT
     self.sock.settimeout(timeout)
     data, _ = self.__read_response_from_socket()
@@ -712,7 +854,7 @@ class ItsSession(object):
     if ae_target_fps_min and ae_target_fps_max:
       cmd['aeTargetFpsMin'] = ae_target_fps_min
       cmd['aeTargetFpsMax'] = ae_target_fps_max
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
+    self._send_cmd(cmd)
     timeout = self.SOCK_TIMEOUT + self.EXTRA_SOCK_TIMEOUT
     self.sock.settimeout(timeout)
 
@@ -737,11 +879,13 @@ class ItsSession(object):
     cmd = {}
     cmd[_CMD_NAME_STR] = 'getSupportedVideoQualities'
     cmd[_CAMERA_ID_STR] = camera_id
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
+    self._send_cmd(cmd)
     data, _ = self.__read_response_from_socket()
     if data[_TAG_STR] != 'supportedVideoQualities':
       raise error_util.CameraItsError('Invalid command response')
-    return data[_STR_VALUE].split(';')[:-1]  # remove the last appended ';'
+    # remove the last appended ';'
+    qualities = data[_STR_VALUE].rstrip(';')
+    return qualities.split(';') if qualities else []
 
   def get_supported_preview_sizes(self, camera_id):
     """Get all supported preview resolutions for this camera device.
@@ -757,7 +901,7 @@ class ItsSession(object):
         _CMD_NAME_STR: 'getSupportedPreviewSizes',
         _CAMERA_ID_STR: camera_id
     }
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
+    self._send_cmd(cmd)
     timeout = self.SOCK_TIMEOUT + self.EXTRA_SOCK_TIMEOUT
     self.sock.settimeout(timeout)
     data, _ = self.__read_response_from_socket()
@@ -783,7 +927,7 @@ class ItsSession(object):
         'cmdName': 'getSupportedExtensions',
         'cameraId': camera_id
     }
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
+    self._send_cmd(cmd)
     timeout = self.SOCK_TIMEOUT + self.EXTRA_SOCK_TIMEOUT
     self.sock.settimeout(timeout)
     data, _ = self.__read_response_from_socket()
@@ -806,13 +950,17 @@ class ItsSession(object):
     Returns:
       List of sizes supported for this camera, extension, and format.
     """
+    cache_key = ('getSupportedExtensionSizes', camera_id, extension,
+                 image_format)
+    if cache_key in self._rpc_cache:
+      return list(self._rpc_cache[cache_key])
     cmd = {
         'cmdName': 'getSupportedExtensionSizes',
         'cameraId': camera_id,
         'extension': extension,
         'format': image_format
     }
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
+    self._send_cmd(cmd)
     timeout = self.SOCK_TIMEOUT + self.EXTRA_SOCK_TIMEOUT
     self.sock.settimeout(timeout)
     data, _ = self.__read_response_from_socket()
@@ -820,18 +968,21 @@ class ItsSession(object):
       raise error_util.CameraItsError('Invalid command response')
     if not data[_STR_VALUE]:
       raise error_util.CameraItsError('No supported extensions')
-    return data[_STR_VALUE].split(';')
+    sizes = tuple(data[_STR_VALUE].split(';'))
+    self._rpc_cache[cache_key] = sizes
+    return list(sizes)
 
   def get_display_size(self):
     """Get the display size of the screen.
 
     Returns:
-      The size of the display resolution in pixels.
+      The size of the display resolution in pixels as a (width, height) tuple
+      of ints.
     """
-    cmd = {
-        'cmdName': 'getDisplaySize'
-    }
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
+    cache_key = ('getDisplaySize',)
+    if cache_key in self._rpc_cache:
+      return self._rpc_cache[cache_key]
+    self.sock.sendall(_GET_DISPLAY_SIZE_CMD)
     timeout = self.SOCK_TIMEOUT + self.EXTRA_SOCK_TIMEOUT
     self.sock.settimeout(timeout)
     data, _ = self.__read_response_from_socket()
@@ -839,7 +990,9 @@ class ItsSession(object):
       raise error_util.CameraItsError('Invalid command response')
     if not data['strValue']:
       raise error_util.CameraItsError('No display size')
-    return data['strValue'].split('x')
+    size = tuple(int(x) for x in data['strValue'].split('x'))
+    self._rpc_cache[cache_key] = size
+    return size
 
   def get_max_camcorder_profile_size(self, camera_id):
     """Get the maximum camcorder profile size for this camera device.
@@ -847,13 +1000,17 @@ class ItsSession(object):
     Args:
       camera_id: int; device id
     Returns:
-      The maximum size among all camcorder profiles supported by this camera.
+      The maximum size among all camcorder profiles supported by this camera,
+      as a (width, height) tuple of ints.
     """
+    cache_key = ('getMaxCamcorderProfileSize', camera_id)
+    if cache_key in self._rpc_cache:
+      return self._rpc_cache[cache_key]
     cmd = {
         'cmdName': 'getMaxCamcorderProfileSize',
         'cameraId': camera_id
     }
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
+    self._send_cmd(cmd)
     timeout = self.SOCK_TIMEOUT + self.EXTRA_SOCK_TIMEOUT
     self.sock.settimeout(timeout)
     data, _ = self.__read_response_from_socket()
@@ -861,7 +1018,9 @@ class ItsSession(object):
       raise error_util.CameraItsError('Invalid command response')
     if not data['strValue']:
       raise error_util.CameraItsError('No max camcorder profile size')
-    return data['strValue'].split('x')
+    size = tuple(int(x) for x in data['strValue'].split('x'))
+    self._rpc_cache[cache_key] = size
+    return size
 
   def do_simple_capture(self, cmd, out_surface):
     """Issue single capture request via command and read back image/metadata.
@@ -877,7 +1036,7 @@ class ItsSession(object):
       * format: image format
       * metadata: the capture result object
     """
-    fmt = out_surface['format'] if 'format' in out_surface else 'yuv'
+    fmt = out_surface.get('format', 'yuv')
     if fmt == 'jpg': fmt = 'jpeg'
 
     # we only have 1 capture request and 1 surface by definition.
@@ -894,36 +1053,25 @@ class ItsSession(object):
     else:
       cam_id = self._camera_id
 
-    bufs[cam_id] = {
-        'raw': [],
-        'raw10': [],
-        'raw12': [],
-        'rawStats': [],
-        'dng': [],
-        'jpeg': [],
-        'y8': []
-    }
+    bufs[cam_id] = {fmt: []}
 
     # Only allow yuv output to multiple targets
     yuv_surface = None
     if cam_id == self._camera_id:
       if 'physicalCamera' not in out_surface:
-        if out_surface['format'] == 'yuv':
+        if fmt == 'yuv':
           yuv_surface = out_surface
     else:
       if ('physicalCamera' in out_surface and
           out_surface['physicalCamera'] == cam_id):
-        if out_surface['format'] == 'yuv':
+        if fmt == 'yuv':
           yuv_surface = out_surface
 
     # Compute the buffer size of YUV targets
     yuv_maxsize_1d = 0
     if yuv_surface is not None:
       if ('width' not in yuv_surface and 'height' not in yuv_surface):
-        if self.props is None:
-          raise error_util.CameraItsError('Camera props are unavailable')
-        yuv_maxsize_2d = capture_request_utils.get_available_output_sizes(
-            'yuv', self.props)[0]
+        yuv_maxsize_2d = self.max_yuv_size
         # YUV420 size = 1.5 bytes per pixel
         yuv_maxsize_1d = (yuv_maxsize_2d[0] * yuv_maxsize_2d[1] * 3) // 2
       if 'width' in yuv_surface and 'height' in yuv_surface:
@@ -935,7 +1083,7 @@ class ItsSession(object):
 
     cam_ids = self._camera_id
     self.sock.settimeout(self.SOCK_TIMEOUT + self.EXTRA_SOCK_TIMEOUT)
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
+    self._send_cmd(cmd)
 
     nbufs = 0
     md = None
@@ -945,16 +1093,16 @@ class ItsSession(object):
     capture_results_returned = False
     while (nbufs < ncap) or (not capture_results_returned):
       json_obj, buf = self.__read_response_from_socket()
-      if (json_obj[_TAG_STR] in ItsSession.IMAGE_FORMAT_LIST_1 and
-          buf is not None):
-        fmt = json_obj[_TAG_STR][:-5]
-        bufs[self._camera_id][fmt].append(buf)
+      tag = json_obj[_TAG_STR]
+      tag_fmt = ItsSession._IMAGE_TAG_TO_FORMAT.get(tag)
+      if tag_fmt is not None and buf is not None:
+        _append_buf(bufs, self._camera_id, tag_fmt, buf)
         nbufs += 1
-      elif json_obj[_TAG_STR] == 'yuvImage':
-        buf_size = numpy.product(buf.shape)
+      elif tag == 'yuvImage':
+        buf_size = buf.size
         yuv_bufs[self._camera_id][buf_size].append(buf)
         nbufs += 1
-      elif json_obj[_TAG_STR] == 'captureResults':
+      elif tag == 'captureResults':
         capture_results_returned = True
         md = json_obj[_OBJ_VALUE_STR]['captureResult']
         physical_md = json_obj[_OBJ_VALUE_STR]['physicalResults']
@@ -974,22 +1122,20 @@ class ItsSession(object):
               f'Requested: {requested_width}x{requested_height}, '
               f'Received: {width}x{height}')
       else:
-        tag_string = unicodedata.normalize('NFKD', json_obj[_TAG_STR]).encode(
-            'ascii', 'ignore')
+        # ItsService tags are ASCII, so prefixes are matched as plain str.
         for x in ItsSession.IMAGE_FORMAT_LIST_2:
-          x = bytes(x, encoding='utf-8')
-          if tag_string.startswith(x):
-            if x == b'yuvImage':
-              physical_id = json_obj[_TAG_STR][len(x):]
+          if tag.startswith(x):
+            if x == 'yuvImage':
+              physical_id = tag[len(x):]
               if physical_id in cam_ids:
-                buf_size = numpy.product(buf.shape)
+                buf_size = buf.size
                 yuv_bufs[physical_id][buf_size].append(buf)
                 nbufs += 1
             else:
-              physical_id = json_obj[_TAG_STR][len(x):]
+              physical_id = tag[len(x):]
               if physical_id in cam_ids:
-                fmt = x[:-5].decode('UTF-8')
-                bufs[physical_id][fmt].append(buf)
+                fmt = x[:-5]
+                _append_buf(bufs, physical_id, fmt, buf)
                 nbufs += 1
 
     if 'physicalCamera' in out_surface:
@@ -1043,12 +1189,13 @@ class ItsSession(object):
       * format: image format
       * metadata: the capture result object
     """
-    cmd = {}
-    cmd[_CMD_NAME_STR] = 'doCaptureWithFlash'
-    cmd['previewRequestStart'] = [preview_request_start]
-    cmd['previewRequestIdle'] = [preview_request_idle]
-    cmd['stillCaptureRequest'] = [still_capture_req]
-    cmd['outputSurfaces'] = [out_surface]
+    cmd = {
+        _CMD_NAME_STR: 'doCaptureWithFlash',
+        'previewRequestStart': [preview_request_start],
+        'previewRequestIdle': [preview_request_idle],
+        'stillCaptureRequest': [still_capture_req],
+        'outputSurfaces': [out_surface]
+    }
 
     logging.debug('Capturing image with ON_AUTO_FLASH.')
     return self.do_simple_capture(cmd, out_surface)
@@ -1076,12 +1223,13 @@ class ItsSession(object):
                         "yuv","jpeg","raw","raw10","raw12","rawStats","dng"].
       * metadata: the capture result object (Python dictionary).
     """
-    cmd = {}
-    cmd[_CMD_NAME_STR] = 'doCaptureWithExtensions'
-    cmd['repeatRequests'] = []
-    cmd['captureRequests'] = [cap_request]
-    cmd['extension'] = extension
-    cmd['outputSurfaces'] = [out_surface]
+    cmd = {
+        _CMD_NAME_STR: 'doCaptureWithExtensions',
+        'repeatRequests': [],
+        'captureRequests': [cap_request],
+        'extension': extension,
+        'outputSurfaces': [out_surface]
+    }
 
     logging.debug('Capturing image with EXTENSIONS.')
     return self.do_simple_capture(cmd, out_surface)
@@ -1238,15 +1386,16 @@ class ItsSession(object):
                         "yuv","jpeg","raw","raw10","raw12","rawStats","dng"].
       * metadata: the capture result object (Python dictionary).
     """
-    cmd = {}
     if reprocess_format is not None:
       if repeat_request is not None:
         raise error_util.CameraItsError(
             'repeating request + reprocessing is not supported')
-      cmd[_CMD_NAME_STR] = 'doReprocessCapture'
-      cmd['reprocessFormat'] = reprocess_format
+      cmd = {
+          _CMD_NAME_STR: 'doReprocessCapture',
+          'reprocessFormat': reprocess_format
+      }
     else:
-      cmd[_CMD_NAME_STR] = 'doCapture'
+      cmd = {_CMD_NAME_STR: 'doCapture'}
 
     if repeat_request is None:
       cmd['repeatRequests'] = []
@@ -1266,12 +1415,11 @@ class ItsSession(object):
       else:
         cmd['outputSurfaces'] = out_surfaces
       formats = [
-          c['format'] if 'format' in c else 'yuv' for c in cmd['outputSurfaces']
+          'jpeg' if f == 'jpg' else f
+          for f in (c.get('format', 'yuv') for c in cmd['outputSurfaces'])
       ]
-      formats = [s if s != 'jpg' else 'jpeg' for s in formats]
     else:
-      max_yuv_size = capture_request_utils.get_available_output_sizes(
-          'yuv', self.props)[0]
+      max_yuv_size = self.max_yuv_size
       formats = ['yuv']
       cmd['outputSurfaces'] = [{
           'format': 'yuv',
@@ -1282,9 +1430,13 @@ class ItsSession(object):
     ncap = len(cmd['captureRequests'])
     nsurf = 1 if out_surfaces is None else len(cmd['outputSurfaces'])
 
+    # Camera IDs in request order, plus a set for membership tests
     cam_ids = []
+    cam_id_set = set()
     bufs = {}
     yuv_bufs = {}
+    # YUV buffer size of each output surface, by surface index
+    yuv_size_for_surface = {}
     for i, s in enumerate(cmd['outputSurfaces']):
       if self._hidden_physical_id:
         s['physicalCamera'] = self._hidden_physical_id
@@ -1294,77 +1446,44 @@ class ItsSession(object):
       else:
         cam_id = self._camera_id
 
-      if cam_id not in cam_ids:
+      if cam_id not in cam_id_set:
+        cam_id_set.add(cam_id)
         cam_ids.append(cam_id)
-        bufs[cam_id] = {
-            'raw': [],
-            'raw10': [],
-            'raw12': [],
-            'rawStats': [],
-            'dng': [],
-            'jpeg': [],
-            'jpeg_r': [],
-            'y8': []
-        }
 
     for cam_id in cam_ids:
-       # Only allow yuv output to multiple targets
-      if cam_id == self._camera_id:
-        yuv_surfaces = [
-            s for s in cmd['outputSurfaces']
-            if s['format'] == 'yuv' and 'physicalCamera' not in s
-        ]
-        formats_for_id = [
-            s['format']
-            for s in cmd['outputSurfaces']
-            if 'physicalCamera' not in s
-        ]
-      else:
-        yuv_surfaces = [
-            s for s in cmd['outputSurfaces'] if s['format'] == 'yuv' and
-            'physicalCamera' in s and s['physicalCamera'] == cam_id
-        ]
-        formats_for_id = [
-            s['format']
-            for s in cmd['outputSurfaces']
-            if 'physicalCamera' in s and s['physicalCamera'] == cam_id
-        ]
-
-      n_yuv = len(yuv_surfaces)
-      # Compute the buffer size of YUV targets
-      yuv_maxsize_1d = 0
-      for s in yuv_surfaces:
-        if ('width' not in s and 'height' not in s):
-          if self.props is None:
-            raise error_util.CameraItsError('Camera props are unavailable')
-          yuv_maxsize_2d = capture_request_utils.get_available_output_sizes(
-              'yuv', self.props)[0]
+      # Collect formats and YUV buffer sizes for this camera in one pass.
+      # Only allow yuv output to multiple targets.
+      formats_for_id = set()
+      yuv_bufs[cam_id] = {}
+      for j, s in enumerate(cmd['outputSurfaces']):
+        if cam_id == self._camera_id:
+          if 'physicalCamera' in s:
+            continue
+        elif s.get('physicalCamera') != cam_id:
+          continue
+        surface_fmt = s.get('format', 'yuv')
+        if surface_fmt == 'yuv':
+          if 'width' in s and 'height' in s:
+            w, h = s['width'], s['height']
+          else:
+            w, h = self.max_yuv_size
           # YUV420 size = 1.5 bytes per pixel
-          yuv_maxsize_1d = (yuv_maxsize_2d[0] * yuv_maxsize_2d[1] * 3) // 2
-          break
-      yuv_sizes = [
-          (c['width'] * c['height'] * 3) // 2
-          if 'width' in c and 'height' in c else yuv_maxsize_1d
-          for c in yuv_surfaces
-      ]
-      # Currently we don't pass enough metadata from ItsService to distinguish
-      # different yuv stream of same buffer size
-      if len(yuv_sizes) != len(set(yuv_sizes)):
-        raise error_util.CameraItsError(
-            'ITS does not support yuv outputs of same buffer size')
-      if len(formats_for_id) > len(set(formats_for_id)):
-        if n_yuv != len(formats_for_id) - len(set(formats_for_id)) + 1:
+          yuv_size = (w * h * 3) // 2
+          # Currently we don't pass enough metadata from ItsService to
+          # distinguish different yuv stream of same buffer size
+          if yuv_size in yuv_bufs[cam_id]:
+            raise error_util.CameraItsError(
+                'ITS does not support yuv outputs of same buffer size')
+          yuv_bufs[cam_id][yuv_size] = []
+          yuv_size_for_surface[j] = yuv_size
+        elif surface_fmt in formats_for_id:
           raise error_util.CameraItsError('Duplicate format requested')
+        formats_for_id.add(surface_fmt)
 
-      yuv_bufs[cam_id] = {size: [] for size in yuv_sizes}
+      # Only hold buffers for the formats requested from this camera
+      bufs[cam_id] = {f if f != 'jpg' else 'jpeg': [] for f in formats_for_id}
 
-    raw_formats = 0
-    raw_formats += 1 if 'dng' in formats else 0
-    raw_formats += 1 if 'raw' in formats else 0
-    raw_formats += 1 if 'raw10' in formats else 0
-    raw_formats += 1 if 'raw12' in formats else 0
-    raw_formats += 1 if 'rawStats' in formats else 0
-    if raw_formats > 1:
+    if len(_RAW_FORMATS.intersection(formats)) > 1:
       raise error_util.CameraItsError('Different raw formats not supported')
 
     # Detect long exposure time and set timeout accordingly
@@ -1382,7 +1501,7 @@ class ItsSession(object):
     logging.debug('Capturing %d frame%s with %d format%s [%s]', ncap,
                   's' if ncap > 1 else '', nsurf, 's' if nsurf > 1 else '',
                   ','.join(formats))
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
+    self._send_cmd(cmd)
 
     # Wait for ncap*nsurf images and ncap metadata responses.
     # Assume that captures come out in the same order as requested in
@@ -1395,47 +1514,45 @@ class ItsSession(object):
     heights = None
     while nbufs < ncap * nsurf or len(mds) < ncap:
       json_obj, buf = self.__read_response_from_socket()
-      if (json_obj[_TAG_STR] in ItsSession.IMAGE_FORMAT_LIST_1 and
-          buf is not None):
-        fmt = json_obj[_TAG_STR][:-5]
-        bufs[self._camera_id][fmt].append(buf)
+      tag = json_obj[_TAG_STR]
+      tag_fmt = ItsSession._IMAGE_TAG_TO_FORMAT.get(tag)
+      if tag_fmt is not None and buf is not None:
+        _append_buf(bufs, self._camera_id, tag_fmt, buf)
         nbufs += 1
       # Physical camera is appended to the tag string of a private capture
-      elif json_obj[_TAG_STR].startswith('privImage'):
+      elif tag.startswith('privImage'):
         # The private image format buffers are opaque to camera clients
         # and cannot be accessed.
         nbufs += 1
-      elif json_obj[_TAG_STR] == 'yuvImage':
-        buf_size = numpy.product(buf.shape)
+      elif tag == 'yuvImage':
+        buf_size = buf.size
         yuv_bufs[self._camera_id][buf_size].append(buf)
         nbufs += 1
-      elif json_obj[_TAG_STR] == 'captureResults':
+      elif tag == 'captureResults':
         mds.append(json_obj[_OBJ_VALUE_STR]['captureResult'])
         physical_mds.append(json_obj[_OBJ_VALUE_STR]['physicalResults'])
         outputs = json_obj[_OBJ_VALUE_STR]['outputs']
         widths = [out['width'] for out in outputs]
         heights = [out['height'] for out in outputs]
       else:
-        tag_string = unicodedata.normalize('NFKD', json_obj[_TAG_STR]).encode(
-            'ascii', 'ignore')
+        # ItsService tags are ASCII, so prefixes are matched as plain str.
         for x in ItsSession.IMAGE_FORMAT_LIST_2:
-          x = bytes(x, encoding='utf-8')
-          if tag_string.startswith(x):
-            if x == b'yuvImage':
-              physical_id = json_obj[_TAG_STR][len(x):]
-              if physical_id in cam_ids:
-                buf_size = numpy.product(buf.shape)
+          if tag.startswith(x):
+            if x == 'yuvImage':
+              physical_id = tag[len(x):]
+              if physical_id in cam_id_set:
+                buf_size = buf.size
                 yuv_bufs[physical_id][buf_size].append(buf)
                 nbufs += 1
             else:
-              physical_id = json_obj[_TAG_STR][len(x):]
-              if physical_id in cam_ids:
-                fmt = x[:-5].decode('UTF-8')
-                bufs[physical_id][fmt].append(buf)
+              physical_id = tag[len(x):]
+              if physical_id in cam_id_set:
+                fmt = x[:-5]
+                _append_buf(bufs, physical_id, fmt, buf)
                 nbufs += 1
-    rets = []
+    rets = [None] * len(formats)
     for j, fmt in enumerate(formats):
-      objs = []
+      objs = [None] * ncap
       if 'physicalCamera' in cmd['outputSurfaces'][j]:
         cam_id = cmd['outputSurfaces'][j]['physicalCamera']
       else:
@@ -1455,12 +1572,11 @@ class ItsSession(object):
               break
 
         if fmt == 'yuv':
-          buf_size = (widths[j] * heights[j] * 3) // 2
-          obj['data'] = yuv_bufs[cam_id][buf_size][i]
+          obj['data'] = yuv_bufs[cam_id][yuv_size_for_surface[j]][i]
         elif fmt != 'priv':
           obj['data'] = bufs[cam_id][fmt][i]
-        objs.append(obj)
-      rets.append(objs if ncap > 1 else objs[0])
+        objs[i] = obj
+      rets[j] = objs if ncap > 1 else objs[0]
     self.sock.settimeout(self.SOCK_TIMEOUT)
     if len(rets) > 1 or (isinstance(rets[0], dict) and
                          isinstance(cap_request, list)):
@@ -1483,10 +1599,8 @@ class ItsSession(object):
     Returns:
       Nothing.
     """
-    cmd = {}
-    cmd[_CMD_NAME_STR] = 'doVibrate'
-    cmd['pattern'] = pattern
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
+    cmd = {_CMD_NAME_STR: 'doVibrate', 'pattern': pattern}
+    self._send_cmd(cmd)
     data, _ = self.__read_response_from_socket()
     if data[_TAG_STR] != 'vibrationStarted':
       raise error_util.CameraItsError('Invalid response for command: %s' %
@@ -1501,10 +1615,8 @@ class ItsSession(object):
     Returns:
      Nothing.
     """
-    cmd = {}
-    cmd[_CMD_NAME_STR] = 'setAudioRestriction'
-    cmd['mode'] = mode
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
+    cmd = {_CMD_NAME_STR: 'setAudioRestriction', 'mode': mode}
+    self._send_cmd(cmd)
     data, _ = self.__read_response_from_socket()
     if data[_TAG_STR] != 'audioRestrictionSet':
       raise error_util.CameraItsError('Invalid response for command: %s' %
@@ -1589,7 +1701,7 @@ class ItsSession(object):
         cmd['zoomRatio'] = zoom_ratio
       else:
         raise AssertionError(f'Zoom ratio {zoom_ratio} out of range')
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
+    self._send_cmd(cmd)
 
     # Wait for each specified 3A to converge.
     ae_sens = None
@@ -1600,19 +1712,20 @@ class ItsSession(object):
     converged = False
     while True:
       data, _ = self.__read_response_from_socket()
+      tag = data[_TAG_STR]
       vals = data[_STR_VALUE].split()
-      if data[_TAG_STR] == 'aeResult':
+      if tag == 'aeResult':
         if do_ae:
           ae_sens, ae_exp = [int(i) for i in vals]
-      elif data[_TAG_STR] == 'afResult':
+      elif tag == 'afResult':
         if do_af:
           af_dist = float(vals[0])
-      elif data[_TAG_STR] == 'awbResult':
+      elif tag == 'awbResult':
         awb_gains = [float(f) for f in vals[:4]]
         awb_transform = [float(f) for f in vals[4:]]
-      elif data[_TAG_STR] == '3aConverged':
+      elif tag == '3aConverged':
         converged = True
-      elif data[_TAG_STR] == '3aDone':
+      elif tag == '3aDone':
         break
       else:
         raise error_util.CameraItsError('Invalid command response')
@@ -1638,7 +1751,7 @@ class ItsSession(object):
       else:
         raise AssertionError(f'Zoom ratio {zoom_ratio} out of range')
     converged = False
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
+    self._send_cmd(cmd)
 
     while True:
       data, _ = self.__read_response_from_socket()
@@ -1671,10 +1784,10 @@ class ItsSession(object):
       focal_l = focal_ls[0]
 
     sensor_size = props['android.sensor.info.physicalSize']
-    diag = math.sqrt(sensor_size['height']**2 + sensor_size['width']**2)
+    diag = math.hypot(sensor_size['height'], sensor_size['width'])
     try:
       fov = str(round(2 * math.degrees(math.atan(diag / (2 * focal_l))), 2))
-    except ValueError:
+    except ZeroDivisionError:
       fov = str(0)
     logging.debug('Calculated FoV: %s', fov)
     return fov
@@ -1693,33 +1806,11 @@ class ItsSession(object):
     """
     chart_scaling = opencv_processing_utils.calc_chart_scaling(
         chart_distance, camera_fov)
-    if math.isclose(
-        chart_scaling,
-        opencv_processing_utils.SCALE_RFOV_IN_WFOV_BOX,
-        abs_tol=SCALING_TO_FILE_ATOL):
-      file_name = f'{scene}_{opencv_processing_utils.SCALE_RFOV_IN_WFOV_BOX}x_scaled.png'
-    elif math.isclose(
-        chart_scaling,
-        opencv_processing_utils.SCALE_TELE_IN_WFOV_BOX,
-        abs_tol=SCALING_TO_FILE_ATOL):
-      file_name = f'{scene}_{opencv_processing_utils.SCALE_TELE_IN_WFOV_BOX}x_scaled.png'
-    elif math.isclose(
-        chart_scaling,
-        opencv_processing_utils.SCALE_TELE25_IN_RFOV_BOX,
-        abs_tol=SCALING_TO_FILE_ATOL):
-      file_name = f'{scene}_{opencv_processing_utils.SCALE_TELE25_IN_RFOV_BOX}x_scaled.png'
-    elif math.isclose(
-        chart_scaling,
-        opencv_processing_utils.SCALE_TELE40_IN_RFOV_BOX,
-        abs_tol=SCALING_TO_FILE_ATOL):
-      file_name = f'{scene}_{opencv_processing_utils.SCALE_TELE40_IN_RFOV_BOX}x_scaled.png'
-    elif math.isclose(
-        chart_scaling,
-        opencv_processing_utils.SCALE_TELE_IN_RFOV_BOX,
-        abs_tol=SCALING_TO_FILE_ATOL):
-      file_name = f'{scene}_{opencv_processing_utils.SCALE_TELE_IN_RFOV_BOX}x_scaled.png'
-    else:
-      file_name = f'{scene}.png'
+    file_name = f'{scene}.png'
+    for scale in _SCALED_CHART_SCALES:
+      if math.isclose(chart_scaling, scale, abs_tol=SCALING_TO_FILE_ATOL):
+        file_name = f'{scene}_{scale}x_scaled.png'
+        break
     logging.debug('Scene to load: %s', file_name)
     return file_name
 
@@ -1742,17 +1833,10 @@ class ItsSession(object):
       cmd['outputSurfaces'] = [out_surfaces]
     else:
       cmd['outputSurfaces'] = out_surfaces
-    formats = [c['format'] if 'format' in c else 'yuv'
-               for c in cmd['outputSurfaces']]
-    formats = [s if s != 'jpg' else 'jpeg' for s in formats]
 
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
-
-    data, _ = self.__read_response_from_socket()
-    if data[_TAG_STR] != 'streamCombinationSupport':
-      raise error_util.CameraItsError('Failed to query stream combination')
-
-    return data[_STR_VALUE] == 'supportedCombination'
+    return self._query(
+        cmd, 'streamCombinationSupport',
+        'Failed to query stream combination') == 'supportedCombination'
 
   def is_camera_privacy_mode_supported(self):
     """Query whether the mobile device supports camera privacy mode.
@@ -1763,15 +1847,9 @@ class ItsSession(object):
     Returns:
       Boolean
     """
-    cmd = {}
-    cmd[_CMD_NAME_STR] = 'isCameraPrivacyModeSupported'
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
-
-    data, _ = self.__read_response_from_socket()
-    if data[_TAG_STR] != 'cameraPrivacyModeSupport':
-      raise error_util.CameraItsError('Failed to query camera privacy mode'
-                                      ' support')
-    return data[_STR_VALUE] == 'true'
+    return self._query(
+        _IS_CAMERA_PRIVACY_MODE_SUPPORTED_CMD, 'cameraPrivacyModeSupport',
+        'Failed to query camera privacy mode support') == 'true'
 
   def is_primary_camera(self):
     """Query whether the camera device is a primary rear/front camera.
@@ -1782,15 +1860,9 @@ class ItsSession(object):
     Returns:
       Boolean
     """
-    cmd = {}
-    cmd[_CMD_NAME_STR] = 'isPrimaryCamera'
-    cmd[_CAMERA_ID_STR] = self._camera_id
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
-
-    data, _ = self.__read_response_from_socket()
-    if data[_TAG_STR] != 'primaryCamera':
-      raise error_util.CameraItsError('Failed to query primary camera')
-    return data[_STR_VALUE] == 'true'
+    cmd = {_CMD_NAME_STR: 'isPrimaryCamera', _CAMERA_ID_STR: self._camera_id}
+    return self._query(
+        cmd, 'primaryCamera', 'Failed to query primary camera') == 'true'
 
   def is_performance_class(self):
     """Query whether the mobile device is an R or S performance class device.
@@ -1798,14 +1870,9 @@ class ItsSession(object):
     Returns:
       Boolean
     """
-    cmd = {}
-    cmd[_CMD_NAME_STR] = 'isPerformanceClass'
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
-
-    data, _ = self.__read_response_from_socket()
-    if data[_TAG_STR] != 'performanceClass':
-      raise error_util.CameraItsError('Failed to query performance class')
-    return data[_STR_VALUE] == 'true'
+    return self._query(
+        _IS_PERFORMANCE_CLASS_CMD, 'performanceClass',
+        'Failed to query performance class') == 'true'
 
   def measure_camera_launch_ms(self):
     """Measure camera launch latency in millisecond, from open to first frame.
@@ -1813,19 +1880,11 @@ class ItsSession(object):
     Returns:
       Camera launch latency from camera open to receipt of first frame
     """
-    cmd = {}
-    cmd[_CMD_NAME_STR] = 'measureCameraLaunchMs'
-    cmd[_CAMERA_ID_STR] = self._camera_id
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
-
-    timeout = self.SOCK_TIMEOUT_FOR_PERF_MEASURE
-    self.sock.settimeout(timeout)
-    data, _ = self.__read_response_from_socket()
-    self.sock.settimeout(self.SOCK_TIMEOUT)
-
-    if data[_TAG_STR] != 'cameraLaunchMs':
-      raise error_util.CameraItsError('Failed to measure camera launch latency')
-    return float(data[_STR_VALUE])
+    cmd = {_CMD_NAME_STR: 'measureCameraLaunchMs',
+           _CAMERA_ID_STR: self._camera_id}
+    return float(self._query(
+        cmd, 'cameraLaunchMs', 'Failed to measure camera launch latency',
+        timeout=self.SOCK_TIMEOUT_FOR_PERF_MEASURE))
 
   def measure_camera_1080p_jpeg_capture_ms(self):
     """Measure camera 1080P jpeg capture latency in milliseconds.
@@ -1833,23 +1892,17 @@ class ItsSession(object):
     Returns:
       Camera jpeg capture latency in milliseconds
     """
-    cmd = {}
-    cmd[_CMD_NAME_STR] = 'measureCamera1080pJpegCaptureMs'
-    cmd[_CAMERA_ID_STR] = self._camera_id
-    self.sock.send(json.dumps(cmd).encode() + '\n'.encode())
-
-    timeout = self.SOCK_TIMEOUT_FOR_PERF_MEASURE
-    self.sock.settimeout(timeout)
-    data, _ = self.__read_response_from_socket()
-    self.sock.settimeout(self.SOCK_TIMEOUT)
-
-    if data[_TAG_STR] != 'camera1080pJpegCaptureMs':
-      raise error_util.CameraItsError(
-          'Failed to measure camera 1080p jpeg capture latency')
-    return float(data[_STR_VALUE])
+    cmd = {_CMD_NAME_STR: 'measureCamera1080pJpegCaptureMs',
+           _CAMERA_ID_STR: self._camera_id}
+    return float(self._query(
+        cmd, 'camera1080pJpegCaptureMs',
+        'Failed to measure camera 1080p jpeg capture latency',
+        timeout=self.SOCK_TIMEOUT_FOR_PERF_MEASURE))
 
   def _camera_id_to_props(self):
     """Return the properties of each camera ID."""
+    if self._id_to_props_cache is not None:
+      return self._id_to_props_cache
     unparsed_ids = self.get_camera_ids().get('cameraIdArray', [])
     parsed_ids = parse_camera_ids(unparsed_ids)
     id_to_props = {}
@@ -1861,8 +1914,15 @@ class ItsSession(object):
       id_to_props[unparsed_id] = props
     if not id_to_props:
       raise AssertionError('No camera IDs were found.')
+    self._id_to_props_cache = id_to_props
     return id_to_props
 
+  def _camera_fov(self, unparsed_id, props):
+    """Return calc_camera_fov(props), computed once per camera ID."""
+    if unparsed_id not in self._id_to_fov_cache:
+      self._id_to_fov_cache[unparsed_id] = self.calc_camera_fov(props)
+    return self._id_to_fov_cache[unparsed_id]
+
   def has_ultrawide_camera(self, facing):
     """Return if device has an ultrawide camera facing the same direction.
 
@@ -1883,24 +1943,21 @@ class ItsSession(object):
       raise NotImplementedError('Cameras not facing either front or back '
                                 'are currently unsupported.')
     id_to_props = self._camera_id_to_props()
-    fov_and_facing = collections.namedtuple('FovAndFacing', ['fov', 'facing'])
-    id_to_fov_facing = {
-        unparsed_id: fov_and_facing(
-            self.calc_camera_fov(props), props['android.lens.facing']
-        )
-        for unparsed_id, props in id_to_props.items()
-    }
-    logging.debug('IDs to (FOVs, facing): %s', id_to_fov_facing)
-    primary_camera_fov, primary_camera_facing = id_to_fov_facing[
-        primary_camera_id]
-    for unparsed_id, fov_facing_combo in id_to_fov_facing.items():
-      if (float(fov_facing_combo.fov) > float(primary_camera_fov) and
-          fov_facing_combo.facing == primary_camera_facing and
-          unparsed_id != primary_camera_id):
+    primary_camera_fov = float(
+        self._camera_fov(primary_camera_id, id_to_props[primary_camera_id]))
+    primary_camera_facing = id_to_props[primary_camera_id][
+        'android.lens.facing']
+    # Only compute FoVs of cameras facing the same way, stopping at the first
+    # one wider than the primary camera.
+    for unparsed_id, props in id_to_props.items():
+      if (unparsed_id == primary_camera_id or
+          props['android.lens.facing'] != primary_camera_facing):
+        continue
+      fov = float(self._camera_fov(unparsed_id, props))
+      if fov > primary_camera_fov:
         logging.debug('Ultrawide camera found with ID %s and FoV %.3f. '
                       'Primary camera has ID %s and FoV: %.3f.',
-                      unparsed_id, float(fov_facing_combo.fov),
-                      primary_camera_id, float(primary_camera_fov))
+                      unparsed_id, fov, primary_camera_id, primary_camera_fov)
         return True
     return False
 
@@ -1925,28 +1982,39 @@ def parse_camera_ids(ids):
   Returns:
    Array of CameraIdCombo
   """
-  camera_id_combo = collections.namedtuple('CameraIdCombo', ['id', 'sub_id'])
-  id_combos = []
-  for one_id in ids:
-    one_combo = one_id.split(SUB_CAMERA_SEPARATOR)
-    if len(one_combo) == 1:
-      id_combos.append(camera_id_combo(one_combo[0], None))
-    elif len(one_combo) == 2:
-      id_combos.append(camera_id_combo(one_combo[0], one_combo[1]))
-    else:
-      raise AssertionError('Camera id parameters must be either ID or '
-                           f'ID{SUB_CAMERA_SEPARATOR}SUB_ID')
-  return id_combos
+  if any(one_id.count(SUB_CAMERA_SEPARATOR) > 1 for one_id in ids):
+    raise AssertionError('Camera id parameters must be either ID or '
+                         f'ID{SUB_CAMERA_SEPARATOR}SUB_ID')
+  return [
+      _CameraIdCombo(cam_id, sub_id if sep else None)
+      for cam_id, sep, sub_id in (
+          one_id.partition(SUB_CAMERA_SEPARATOR) for one_id in ids)
+  ]
+
+
+def _append_buf(bufs, cam_id, fmt, buf):
+  """Appends an image buffer to the list for its camera and format.
+
+  Args:
+    bufs: Dictionary of camera ID to dictionary of format to buffer list.
+    cam_id: Camera ID the buffer was captured by.
+    fmt: Format of the buffer.
+    buf: Image buffer received from the device.
+  """
+  if fmt not in bufs[cam_id]:
+    raise error_util.CameraItsError(
+        f'Received {fmt} image not requested from camera {cam_id}')
+  bufs[cam_id][fmt].append(buf)
 
 
 def _run(cmd):
   """Replacement for os.system, with hiding of stdout+stderr messages.
 
   Args:
-    cmd: Command to be executed in string format.
+    cmd: List of command arguments to be executed.
   """
-  with open(os.devnull, 'wb') as devnull:
-    subprocess.check_call(cmd.split(), stdout=devnull, stderr=subprocess.STDOUT)
+  subprocess.check_call(
+      cmd, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
 
 
 def do_capture_with_latency(cam, req, sync_latency, fmt=None):
@@ -2054,11 +2122,25 @@ def validate_lighting(y_plane, scene, state='ON', log_path=None):
                            "Valid strings: 'ON', 'OFF'.")
 
 
+@functools.lru_cache(maxsize=None)
+def _get_device_props(device_id):
+  """Reads all system properties of the device with a single getprop call.
+
+  Args:
+    device_id: str; adb serial of the device.
+  Returns:
+    Dictionary of property name to string value.
+  """
+  output = subprocess.check_output(
+      ['adb', '-s', device_id, 'shell', 'getprop'], text=True)
+  return dict(_GETPROP_LINE_PATTERN.findall(output))
+
+
 def get_build_sdk_version(device_id):
   """Return the int build version of the device."""
-  cmd = f'adb -s {device_id} shell getprop ro.build.version.sdk'
   try:
-    build_sdk_version = int(subprocess.check_output(cmd.split()).rstrip())
+    build_sdk_version = int(
+        _get_device_props(device_id).get('ro.build.version.sdk', ''))
     logging.debug('Build SDK version: %d', build_sdk_version)
   except (subprocess.CalledProcessError, ValueError) as exp_errors:
     raise AssertionError('No build_sdk_version.') from exp_errors
@@ -2067,9 +2149,9 @@ def get_build_sdk_version(device_id):
 
 def get_first_api_level(device_id):
   """Return the int value for the first API level of the device."""
-  cmd = f'adb -s {device_id} shell getprop ro.product.first_api_level'
   try:
-    first_api_level = int(subprocess.check_output(cmd.split()).rstrip())
+    first_api_level = int(
+        _get_device_props(device_id).get('ro.product.first_api_level', ''))
     logging.debug('First API level: %d', first_api_level)
   except (subprocess.CalledProcessError, ValueError):
     logging.error('No first_api_level. Setting to build version.')
@@ -2079,9 +2161,9 @@ def get_first_api_level(device_id):
 
 def get_vendor_api_level(device_id):
   """Return the int value for the vendor API level of the device."""
-  cmd = f'adb -s {device_id} shell getprop ro.vendor.api_level'
   try:
-    vendor_api_level = int(subprocess.check_output(cmd.split()).rstrip())
+    vendor_api_level = int(
+        _get_device_props(device_id).get('ro.vendor.api_level', ''))
     logging.debug('First vendor API level: %d', vendor_api_level)
   except (subprocess.CalledProcessError, ValueError):
     logging.error('No vendor_api_level. Setting to build version.')
@@ -2091,11 +2173,9 @@ def get_vendor_api_level(device_id):
 
 def get_media_performance_class(device_id):
   """Return the int value for the media performance class of the device."""
-  cmd = (f'adb -s {device_id} shell '
-         'getprop ro.odm.build.media_performance_class')
   try:
-    media_performance_class = int(
-        subprocess.check_output(cmd.split()).rstrip())
+    media_performance_class = int(_get_device_props(device_id).get(
+        'ro.odm.build.media_performance_class', ''))
     logging.debug('Media performance class: %d', media_performance_class)
   except (subprocess.CalledProcessError, ValueError):
     logging.debug('No media performance class. Setting to 0.')
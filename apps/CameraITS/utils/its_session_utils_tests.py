@@ -13,8 +13,11 @@
 # limitations under the License.
 """Tests for its_session_utils."""
 
+import json
 import logging
+import sys
 import unittest
+from unittest import mock
 
 import numpy
 
@@ -62,6 +65,91 @@ class ItsSessionUtilsTests(unittest.TestCase):
         self.assertTrue(its_session_utils.validate_lighting(
             test_image, 'unittest'), f'image value {brightness} should PASS')
 
+  def test_preserialized_cmds(self):
+    """Tests pre-serialized commands match their JSON serialization."""
+    cmds = {
+        its_session_utils._CHECK_SENSOR_EXISTENCE_CMD: 'checkSensorExistence',
+        its_session_utils._CLOSE_CMD: 'close',
+        its_session_utils._GET_CAMERA_IDS_CMD: 'getCameraIds',
+        its_session_utils._GET_CAMERA_PROPERTIES_CMD: 'getCameraProperties',
+        its_session_utils._GET_DISPLAY_SIZE_CMD: 'getDisplaySize',
+        its_session_utils._GET_SENSOR_EVENTS_CMD: 'getSensorEvents',
+        its_session_utils._IS_LANDSCAPE_TO_PORTRAIT_ENABLED_CMD:
+            'isLandscapeToPortraitEnabled',
+        its_session_utils._IS_CAMERA_PRIVACY_MODE_SUPPORTED_CMD:
+            'isCameraPrivacyModeSupported',
+        its_session_utils._IS_PERFORMANCE_CLASS_CMD: 'isPerformanceClass',
+        its_session_utils._START_SENSOR_EVENTS_CMD: 'startSensorEvents',
+    }
+    for cmd, cmd_name in cmds.items():
+      self.assertEqual(
+          cmd,
+          its_session_utils._json_dumps(
+              {its_session_utils._CMD_NAME_STR: cmd_name}) + b'\n')
+
+  def test_json_dumps(self):
+    """Tests _json_dumps() accepts the same inputs with and without orjson."""
+    orjson_modules = [None]
+    if its_session_utils.orjson is not None:
+      orjson_modules.append(its_session_utils.orjson)
+    for orjson_module in orjson_modules:
+      with mock.patch.object(its_session_utils, 'orjson', orjson_module):
+        self.assertEqual(
+            json.loads(its_session_utils._json_dumps(
+                {'a': numpy.float64(0.5), 1: [2, 3.0]})),
+            {'a': 0.5, '1': [2, 3.0]})
+        with self.assertRaises(TypeError):
+          its_session_utils._json_dumps({'a': numpy.int64(3)})
+
+  def test_parse_argv(self):
+    """Tests _parse_argv() extracts reboot and camera args."""
+    argv_to_args = (
+        (['test'], {}),
+        (['test', 'reboot'], {'reboot': 30}),
+        (['test', 'reboot=5', 'camera=0,1.2'],
+         {'reboot': 5, 'camera_ids': ['0', '1.2']}),
+    )
+    for argv, expected_args in argv_to_args:
+      its_session_utils._parse_argv.cache_clear()
+      with mock.patch.object(sys, 'argv', argv):
+        self.assertEqual(its_session_utils._parse_argv(), expected_args)
+    its_session_utils._parse_argv.cache_clear()
+
+  def test_max_yuv_size(self):
+    """Tests max_yuv_size is cached until props is reassigned."""
+    session = its_session_utils.ItsSession.__new__(
+        its_session_utils.ItsSession)
+    session.props = {'a': 1}
+    with mock.patch.object(
+        its_session_utils.capture_request_utils, 'get_available_output_sizes',
+        side_effect=([(640, 480)], [(320, 240)])) as get_sizes:
+      self.assertEqual(session.max_yuv_size, (640, 480))
+      self.assertEqual(session.max_yuv_size, (640, 480))
+      session.props = {'a': 2}
+      self.assertEqual(session.max_yuv_size, (320, 240))
+      self.assertEqual(get_sizes.call_count, 2)
+
+  def test_get_device_props(self):
+    """Tests one getprop call serves all of the API level getters."""
+    getprop_output = ('[ro.build.version.sdk]: [34]\n'
+                      '[ro.product.first_api_level]: [31]\n'
+                      '[ro.vendor.api_level]: []\n'
+                      '[ro.product.model]: [Pixel [test]]\n')
+    its_session_utils._get_device_props.cache_clear()
+    with mock.patch.object(
+        its_session_utils.subprocess, 'check_output',
+        return_value=getprop_output) as check_output:
+      self.assertEqual(its_session_utils.get_build_sdk_version('serial'), 34)
+      self.assertEqual(its_session_utils.get_first_api_level('serial'), 31)
+      self.assertEqual(its_session_utils.get_vendor_api_level('serial'), 34)
+      self.assertEqual(
+          its_session_utils.get_media_performance_class('serial'), 0)
+      self.assertEqual(
+          its_session_utils._get_device_props('serial')['ro.product.model'],
+          'Pixel [test]')
+      check_output.assert_called_once()
+    its_session_utils._get_device_props.cache_clear()
+
 
 if __name__ == '__main__':
   unittest.main()